@@ -20,19 +20,32 @@ Requirements:
 """
 
 import argparse
+import base64
+import functools
 import json
 import os
 import re
 import shutil
 import subprocess
 import sys
-import urllib.request
-import urllib.error
+import threading
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple, Any
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Optional, Callable, Dict, Iterator, List, Set, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
 
+if TYPE_CHECKING:
+    import http.client  # only for annotations; imported lazily at runtime
+
+# Optional fast JSON codec; the standard library is used when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # =============================================================================
 # CONFIGURATION
@@ -71,6 +84,24 @@ class SentryConfig:
 # BUGSINK API CLIENT
 # =============================================================================
 
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes (raises json.JSONDecodeError on bad input)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+
+# Redirects followed for GET requests (urlopen used to follow them transparently)
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+
 class BugsinkAPI:
     """Client for Bugsink API v0 to manage teams and projects."""
 
@@ -79,54 +110,224 @@ class BugsinkAPI:
         self.api_key = api_key
         self.base_path = "/api/canonical/0"
 
-    def _request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Tuple[int, Any]:
-        """Make an API request."""
-        url = f"{self.api_url}{self.base_path}{endpoint}"
+        # Parse the URL once; requests only append the endpoint path
+        parts = urllib.parse.urlsplit(self.api_url)
+        self._scheme = parts.scheme or "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path_prefix = f"{parts.path}{self.base_path}"
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
+        # Request headers are identical for every call
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
 
-        body = json.dumps(data).encode("utf-8") if data else None
+        # Keep-alive connection, reused across all API calls
+        self._conn: Optional["http.client.HTTPConnection"] = None
+        self._request_prefix = self._path_prefix
+        self._proxy_headers: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        # Listing caches with lowercased-name indexes, invalidated on create
+        self._teams_cache: Optional[List[Dict]] = None
+        self._teams_index: Dict[str, Dict] = {}
+        self._projects_cache: Dict[Optional[str], List[Dict]] = {}
+        self._projects_index: Dict[Optional[str], Dict[str, Dict]] = {}
+        self._prefetched = False
+
+    def _get_connection(self) -> "http.client.HTTPConnection":
+        """Return the shared connection, opening it lazily.
+
+        A proxy from HTTP(S)_PROXY / NO_PROXY is honoured like urlopen does:
+        https is tunnelled through it with CONNECT, plain http requests are
+        sent to it with absolute URLs.
+        """
+        if self._conn is None:
+            # Imported here: http.client (and ssl) are only needed in API mode
+            import http.client
+            import urllib.request
+
+            proxy = urllib.request.getproxies().get(self._scheme)
+            if proxy and urllib.request.proxy_bypass(self._host):
+                proxy = None
+
+            proxy_headers: Dict[str, str] = {}
+            if proxy:
+                if "://" not in proxy:
+                    proxy = f"http://{proxy}"
+                proxy_parts = urllib.parse.urlsplit(proxy)
+                if proxy_parts.username is not None:
+                    credentials = urllib.parse.unquote(proxy_parts.username)
+                    credentials += ":" + urllib.parse.unquote(proxy_parts.password or "")
+                    token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+                    proxy_headers["Proxy-Authorization"] = f"Basic {token}"
+                host, port = proxy_parts.hostname, proxy_parts.port
+            else:
+                host, port = self._host, self._port
+
+            if self._scheme == "https":
+                conn = http.client.HTTPSConnection(host, port, timeout=30)
+                if proxy:
+                    conn.set_tunnel(self._host, self._port, headers=proxy_headers)
+                self._request_prefix = self._path_prefix
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                if proxy:
+                    # Plain http proxies expect the absolute target URL
+                    netloc = self._host if self._port is None else f"{self._host}:{self._port}"
+                    self._request_prefix = f"http://{netloc}{self._path_prefix}"
+                else:
+                    self._request_prefix = self._path_prefix
+            self._proxy_headers = proxy_headers if proxy and self._scheme != "https" else {}
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """Close the shared connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _urlopen(self, method: str, endpoint: str, body: Optional[bytes]) -> Tuple[int, Any]:
+        """Make a request with urllib, which follows redirects."""
+        import urllib.error
+        import urllib.request
 
+        url = f"{self.api_url}{self.base_path}{endpoint}"
         try:
-            request = urllib.request.Request(url, data=body, headers=headers, method=method)
+            request = urllib.request.Request(url, data=body, headers=self._headers, method=method)
             with urllib.request.urlopen(request, timeout=30) as response:
-                response_body = response.read().decode("utf-8")
-                return response.status, json.loads(response_body) if response_body else {}
+                response_body = response.read()
+                return response.status, _json_loads(response_body) if response_body else {}
         except urllib.error.HTTPError as e:
-            error_body = e.read().decode("utf-8") if e.fp else ""
+            error_body = e.read() if e.fp else b""
             try:
-                error_data = json.loads(error_body) if error_body else {}
+                error_data = _json_loads(error_body) if error_body else {}
             except json.JSONDecodeError:
-                error_data = {"detail": error_body}
+                error_data = {"detail": error_body.decode("utf-8", errors="replace")}
             return e.code, error_data
         except urllib.error.URLError as e:
             return 0, {"detail": str(e.reason)}
         except Exception as e:
             return 0, {"detail": str(e)}
 
+    def _request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Tuple[int, Any]:
+        """Make an API request."""
+        body = _json_dumps(data) if data else None
+
+        # One request at a time on the shared connection
+        with self._lock:
+            try:
+                if method != "GET":
+                    # Never send a non-idempotent request on a kept-alive socket
+                    # the server may have dropped: it could not be safely retried
+                    self.close()
+
+                # A kept-alive socket may have been closed by the server in the
+                # meantime; reconnect once before giving up (GET only, a replayed
+                # POST could create the team or project twice).
+                attempts = 2 if method == "GET" else 1
+                for attempt in range(attempts):
+                    conn = self._get_connection()
+                    headers = {**self._headers, **self._proxy_headers} if self._proxy_headers else self._headers
+                    try:
+                        conn.request(method, f"{self._request_prefix}{endpoint}", body=body, headers=headers)
+                        response = conn.getresponse()
+                        response_body = response.read()
+                        break
+                    except (ConnectionResetError, BrokenPipeError):  # incl. RemoteDisconnected
+                        self.close()
+                        if attempt == attempts - 1:
+                            raise
+
+                if response.will_close:
+                    self.close()
+
+                if method == "GET" and response.status in _REDIRECT_STATUSES:
+                    # e.g. http -> https or a missing trailing slash; let urllib follow it
+                    self.close()
+                    return self._urlopen(method, endpoint, body)
+
+                if response.status >= 400:
+                    try:
+                        error_data = _json_loads(response_body) if response_body else {}
+                    except json.JSONDecodeError:
+                        error_data = {"detail": response_body.decode("utf-8", errors="replace")}
+                    return response.status, error_data
+
+                return response.status, _json_loads(response_body) if response_body else {}
+            except Exception as e:
+                self.close()
+                return 0, {"detail": str(e)}
+
     def test_connection(self) -> bool:
-        """Test if the API connection works."""
-        status, _ = self._request("GET", "/teams/")
+        """Test if the API connection works; the team listing is kept for later lookups."""
+        status, data = self._request("GET", "/teams/")
+        if status == 200:
+            self._cache_teams(data.get("results", []))
         return status == 200
 
+    @staticmethod
+    def _index_by_name(items: List[Dict]) -> Dict[str, Dict]:
+        """Map lowercased names to items; the first item wins on duplicates."""
+        index: Dict[str, Dict] = {}
+        for item in items:
+            index.setdefault(item.get("name", "").lower(), item)
+        return index
+
+    def _cache_teams(self, teams: List[Dict]):
+        """Store the team listing and its name index."""
+        self._teams_cache = teams
+        self._teams_index = self._index_by_name(teams)
+
+    def _cache_projects(self, team_id: Optional[str], projects: List[Dict]):
+        """Store a project listing and its name index."""
+        self._projects_cache[team_id] = projects
+        self._projects_index[team_id] = self._index_by_name(projects)
+
     def list_teams(self) -> List[Dict]:
-        """List all teams."""
+        """List all teams (cached per instance)."""
+        if self._teams_cache is not None:
+            return self._teams_cache
+
         status, data = self._request("GET", "/teams/")
         if status == 200:
-            return data.get("results", [])
+            self._cache_teams(data.get("results", []))
+            return self._teams_cache
         return []
 
+    def prefetch(self):
+        """Fetch the full project listing to warm the per-team project caches.
+
+        The project listing is grouped by team, so later list_projects(team_id)
+        lookups for any listed team are served without another round trip.
+        The team listing normally comes from the test_connection() cache.
+        """
+        if self._prefetched:
+            return
+        self._prefetched = True
+
+        teams = self.list_teams()
+        status, data = self._request("GET", "/projects/")
+
+        # Only a complete (single page) listing can stand in for per-team queries
+        if status != 200 or data.get("next") or self._teams_cache is None:
+            return
+
+        by_team: Dict[Optional[str], List[Dict]] = {team.get("id"): [] for team in teams}
+        for project in data.get("results", []):
+            if project.get("team") in by_team:
+                by_team[project.get("team")].append(project)
+        for team_id, projects in by_team.items():
+            if team_id not in self._projects_cache:
+                self._cache_projects(team_id, projects)
+
     def get_team_by_name(self, name: str) -> Optional[Dict]:
         """Find a team by name."""
-        teams = self.list_teams()
-        for team in teams:
-            if team.get("name", "").lower() == name.lower():
-                return team
-        return None
+        self.list_teams()
+        return self._teams_index.get(name.lower())
 
     def create_team(self, name: str, visibility: str = "joinable") -> Optional[Dict]:
         """Create a new team."""
@@ -135,6 +336,8 @@ class BugsinkAPI:
             "visibility": visibility
         })
         if status == 201:
+            self._teams_cache = None
+            self._teams_index = {}
             return data
         print(f"  Error creating team: {data}")
         return None
@@ -150,23 +353,24 @@ class BugsinkAPI:
         return self.create_team(name)
 
     def list_projects(self, team_id: Optional[str] = None) -> List[Dict]:
-        """List all projects, optionally filtered by team."""
+        """List all projects, optionally filtered by team (cached per instance)."""
+        if team_id in self._projects_cache:
+            return self._projects_cache[team_id]
+
         endpoint = "/projects/"
         if team_id:
             endpoint += f"?team={team_id}"
 
         status, data = self._request("GET", endpoint)
         if status == 200:
-            return data.get("results", [])
+            self._cache_projects(team_id, data.get("results", []))
+            return self._projects_cache[team_id]
         return []
 
     def get_project_by_name(self, name: str, team_id: Optional[str] = None) -> Optional[Dict]:
         """Find a project by name."""
-        projects = self.list_projects(team_id)
-        for project in projects:
-            if project.get("name", "").lower() == name.lower():
-                return project
-        return None
+        self.list_projects(team_id)
+        return self._projects_index.get(team_id, {}).get(name.lower())
 
     def get_project_details(self, project_id: int) -> Optional[Dict]:
         """Get project details including DSN."""
@@ -183,6 +387,13 @@ class BugsinkAPI:
             "visibility": visibility
         })
         if status == 201:
+            for key in (team_id, None):
+                self._projects_cache.pop(key, None)
+                self._projects_index.pop(key, None)
+
+            if data.get("dsn"):
+                return data
+
             # Need to get project details to get the DSN
             project_id = data.get("id")
             if project_id:
@@ -196,7 +407,9 @@ class BugsinkAPI:
         project = self.get_project_by_name(name, team_id)
         if project:
             print(f"  Found existing project: {name}")
-            # Get full details including DSN
+            # The listing already carries the DSN; only fetch details if it doesn't
+            if project.get("dsn"):
+                return project
             return self.get_project_details(project.get("id"))
 
         print(f"  Creating project: {name}")
@@ -207,9 +420,43 @@ class BugsinkAPI:
 # LANGUAGE DETECTION
 # =============================================================================
 
+def _flatten_detection_patterns(
+    patterns: Dict[Language, List[Tuple[str, Optional[str]]]],
+) -> Tuple[Dict[str, Tuple[int, Language, Optional[str]]], List[Tuple[int, str, Language, Optional[str]]]]:
+    """Split detection patterns into a literal-filename table and a suffix list.
+
+    Each entry carries its rank in the original (language, pattern) order, so
+    the first matching pattern still wins.
+    """
+    literal_files: Dict[str, Tuple[int, Language, Optional[str]]] = {}
+    glob_patterns: List[Tuple[int, str, Language, Optional[str]]] = []
+    rank = 0
+    for language, language_patterns in patterns.items():
+        for pattern, framework in language_patterns:
+            if pattern.startswith("*"):
+                glob_patterns.append((rank, pattern[1:], language, framework))
+            else:
+                literal_files.setdefault(pattern, (rank, language, framework))
+            rank += 1
+    return literal_files, glob_patterns
+
+
+def _canonical_name_index(literal_files: Dict[str, Any],
+                          package_managers: Dict[Language, List[Tuple[str, str]]]) -> Dict[str, str]:
+    """Map casefolded marker file names to the spelling the lookup tables use."""
+    index = {name.casefold(): name for name in literal_files}
+    for managers in package_managers.values():
+        for lock_file, _ in managers:
+            index[lock_file.casefold()] = lock_file
+    return index
+
+
 class LanguageDetector:
     """Detects project language and framework based on files present."""
 
+    # Any key naming a supported Node.js framework package
+    _NODE_FRAMEWORK_RE = re.compile(rb'"(?:@nestjs/core|next|express|fastify|koa)"\s*:')
+
     DETECTION_PATTERNS: Dict[Language, List[Tuple[str, Optional[str]]]] = {
         Language.PYTHON: [
             ("requirements.txt", None),
@@ -249,6 +496,34 @@ class LanguageDetector:
         ],
     }
 
+    # Flat lookup tables: literal filename -> (rank, language, framework),
+    # and ordered (rank, suffix, language, framework) for wildcard patterns
+    LITERAL_FILES, GLOB_PATTERNS = _flatten_detection_patterns(DETECTION_PATTERNS)
+
+    # Lock files identifying the package manager, in order of preference
+    PACKAGE_MANAGERS: Dict[Language, List[Tuple[str, str]]] = {
+        Language.PYTHON: [
+            ("poetry.lock", "poetry"),
+            ("Pipfile.lock", "pipenv"),
+            ("requirements.txt", "pip"),
+        ],
+        Language.NODEJS: [
+            ("pnpm-lock.yaml", "pnpm"),
+            ("yarn.lock", "yarn"),
+            ("package-lock.json", "npm"),
+        ],
+        Language.TYPESCRIPT: [
+            ("pnpm-lock.yaml", "pnpm"),
+            ("yarn.lock", "yarn"),
+            ("package-lock.json", "npm"),
+        ],
+    }
+
+    # Windows and (by default) macOS match file names case-insensitively, so a
+    # "gemfile" or "PIPFILE" counts there, as it did with Path.exists() checks
+    _CASE_INSENSITIVE_FS = sys.platform in ("win32", "darwin")
+    _CANONICAL_NAMES = _canonical_name_index(LITERAL_FILES, PACKAGE_MANAGERS)
+
     FRAMEWORK_DETECTION = {
         Language.PYTHON: {
             "django": ["manage.py", "settings.py"],
@@ -270,37 +545,37 @@ class LanguageDetector:
         config_files = []
         package_manager = None
 
-        # Check each language pattern
-        for language, patterns in cls.DETECTION_PATTERNS.items():
-            for pattern, framework in patterns:
-                if "*" in pattern:
-                    matches = list(project_root.glob(pattern))
-                    if matches:
-                        detected_language = language
-                        config_files.extend(matches)
-                        if framework:
-                            detected_framework = framework
-                        break
-                else:
-                    file_path = project_root / pattern
-                    if file_path.exists():
-                        detected_language = language
-                        config_files.append(file_path)
-                        if framework:
-                            detected_framework = framework
-                        break
+        # List the project root once; all checks below are in-memory lookups
+        names, by_ext = cls._scan_root(project_root)
+
+        # Lowest-ranked literal marker file present in the root
+        best = None
+        for name in names:
+            hit = cls.LITERAL_FILES.get(name)
+            if hit and (best is None or hit[0] < best[0]):
+                best = hit + ([name],)
 
-            if detected_language != Language.UNKNOWN:
+        # Wildcard patterns only matter if they outrank the literal hit
+        for rank, suffix, language, framework in cls.GLOB_PATTERNS:
+            if best is not None and rank > best[0]:
                 break
+            matches = by_ext.get(suffix)
+            if matches:
+                best = (rank, language, framework, matches)
+                break
+
+        if best is not None:
+            _, detected_language, detected_framework, matched = best
+            config_files.extend(project_root / name for name in matched)
 
         # TypeScript detection (refine from nodejs)
         if detected_language == Language.NODEJS:
-            if (project_root / "tsconfig.json").exists():
+            if "tsconfig.json" in names:
                 detected_language = Language.TYPESCRIPT
                 config_files.append(project_root / "tsconfig.json")
 
         # Detect package manager
-        package_manager = cls._detect_package_manager(project_root, detected_language)
+        package_manager = cls._detect_package_manager(project_root, detected_language, names)
 
         # Detect framework from package.json for Node.js
         if detected_language in (Language.NODEJS, Language.TYPESCRIPT):
@@ -319,28 +594,38 @@ class LanguageDetector:
         )
 
     @classmethod
-    def _detect_package_manager(cls, root: Path, language: Language) -> Optional[str]:
+    def _scan_root(cls, root: Path) -> Tuple[Set[str], Dict[str, List[str]]]:
+        """List entry names in root, plus the same names grouped by extension.
+
+        On case-insensitive filesystems marker files are reported under the
+        spelling the lookup tables use, and extensions are casefolded.
+        """
+        names: Set[str] = set()
+        by_ext: Dict[str, List[str]] = {}
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    ext = os.path.splitext(entry.name)[1]
+                    if cls._CASE_INSENSITIVE_FS:
+                        names.add(cls._CANONICAL_NAMES.get(entry.name.casefold(), entry.name))
+                        ext = ext.casefold()
+                    else:
+                        names.add(entry.name)
+                    if ext:
+                        by_ext.setdefault(ext, []).append(entry.name)
+        except OSError:
+            pass
+        return names, by_ext
+
+    @classmethod
+    def _detect_package_manager(cls, root: Path, language: Language,
+                                names: Optional[Set[str]] = None) -> Optional[str]:
         """Detect the package manager for the project."""
-        managers = {
-            Language.PYTHON: [
-                ("poetry.lock", "poetry"),
-                ("Pipfile.lock", "pipenv"),
-                ("requirements.txt", "pip"),
-            ],
-            Language.NODEJS: [
-                ("pnpm-lock.yaml", "pnpm"),
-                ("yarn.lock", "yarn"),
-                ("package-lock.json", "npm"),
-            ],
-            Language.TYPESCRIPT: [
-                ("pnpm-lock.yaml", "pnpm"),
-                ("yarn.lock", "yarn"),
-                ("package-lock.json", "npm"),
-            ],
-        }
+        if names is None:
+            names = cls._scan_root(root)[0]
 
-        for lock_file, manager in managers.get(language, []):
-            if (root / lock_file).exists():
+        for lock_file, manager in cls.PACKAGE_MANAGERS.get(language, []):
+            if lock_file in names:
                 return manager
 
         return None
@@ -353,8 +638,13 @@ class LanguageDetector:
             return None
 
         try:
-            with open(package_json, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            raw = package_json.read_bytes()
+
+            # Fast path: skip the JSON parse when no framework key appears at all
+            if not cls._NODE_FRAMEWORK_RE.search(raw):
+                return None
+
+            data = json.loads(raw.decode("utf-8"))
 
             deps = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
 
@@ -368,7 +658,7 @@ class LanguageDetector:
                 return "fastify"
             if "koa" in deps:
                 return "koa"
-        except (json.JSONDecodeError, IOError):
+        except (json.JSONDecodeError, UnicodeDecodeError, IOError):
             pass
 
         return None
@@ -378,27 +668,49 @@ class LanguageDetector:
 # TEMPLATE MANAGER
 # =============================================================================
 
+# All template placeholders; the group keeps them in re.split() output
+_PLACEHOLDER_RE = re.compile(r"(\{\{DSN\}\}|\{\{ENVIRONMENT\}\}|\{\{RELEASE\}\}|\$\{SENTRY_DSN\})")
+
+
+@functools.lru_cache(maxsize=64)
+def _load_template(path: str, mtime_ns: int) -> Tuple[str, ...]:
+    """Read and tokenize a template; keyed on mtime so edited templates are re-read.
+
+    Returns literal text at even indices and placeholder names at odd indices.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(_PLACEHOLDER_RE.split(f.read()))
+
+
 class TemplateManager:
     """Manages templates for different languages."""
 
     def __init__(self, templates_dir: Path):
         self.templates_dir = templates_dir
+        self._rendered: Dict[Tuple[str, int, str, str, Optional[str]], str] = {}
 
     def get_template_path(self, language: Language) -> Path:
         """Get the template directory for a language."""
         return self.templates_dir / language.value
 
-    def get_template_files(self, language: Language) -> List[Path]:
-        """Get all template files for a language."""
+    def get_template_files(self, language: Language) -> Iterator[Path]:
+        """Yield all template files (regular files only) for a language."""
         template_path = self.get_template_path(language)
-        if not template_path.exists():
-            return []
-        return list(template_path.glob("**/*"))
+        for dirpath, _, filenames in os.walk(template_path):
+            for filename in filenames:
+                yield Path(dirpath) / filename
 
     def render_template(self, template_path: Path, config: SentryConfig) -> str:
         """Render a template with the given configuration."""
-        with open(template_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        path_str = str(template_path)
+        mtime_ns = template_path.stat().st_mtime_ns
+
+        key = (path_str, mtime_ns, config.dsn, config.environment, config.release)
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            return rendered
+
+        parts = list(_load_template(path_str, mtime_ns))
 
         # Replace placeholders
         replacements = {
@@ -408,16 +720,41 @@ class TemplateManager:
             "${SENTRY_DSN}": config.dsn,
         }
 
-        for placeholder, value in replacements.items():
-            content = content.replace(placeholder, value)
-
-        return content
+        parts[1::2] = [replacements[placeholder] for placeholder in parts[1::2]]
+        rendered = "".join(parts)
+        self._rendered[key] = rendered
+        return rendered
 
 
 # =============================================================================
 # INSTALLERS
 # =============================================================================
 
+# Hardcoded `dsn="..."` assignment in sentry_config.py
+_DSN_PAT = re.compile(r"""dsn\s*=\s*["'][^"']+["']""")
+
+
+# KEY=value line of a .env file (key is everything before the first "=")
+_ENV_LINE_RE = re.compile(r"^([^=\n]*)=(.*)$", re.MULTILINE)
+
+
+def _read_env_values(path: str) -> Dict[str, str]:
+    """Parse KEY=value lines of a .env file."""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    values: Dict[str, str] = {}
+    for key, value in _ENV_LINE_RE.findall(content):
+        values.setdefault(key, value.strip())
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def _env_var_pattern(var_name: str) -> "re.Pattern":
+    """Compiled pattern matching the assignment line of var_name in a .env file."""
+    return re.compile(rf"^[ \t]*{re.escape(var_name)}=.*$", re.MULTILINE)
+
+
 class BaseInstaller:
     """Base class for language-specific installers."""
 
@@ -426,6 +763,12 @@ class BaseInstaller:
         self.config = config
         self.templates = templates
 
+        # Length of "<project_root>/", to print destination paths relative to it
+        self._root_prefix_len = len(str(project.project_root).rstrip(os.sep)) + 1
+
+        # Package-manager runs overlapping with template/env file work
+        self._background: List[Future] = []
+
     def install(self) -> bool:
         """Run the installation process."""
         raise NotImplementedError
@@ -439,12 +782,13 @@ class BaseInstaller:
         raise NotImplementedError
 
     def _run_command(self, cmd: List[str], cwd: Optional[Path] = None) -> bool:
-        """Run a shell command."""
+        """Run a shell command; only stderr is kept, for the failure message."""
         try:
             result = subprocess.run(
                 cmd,
                 cwd=cwd or self.project.project_root,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
             )
             if result.returncode != 0:
@@ -455,6 +799,27 @@ class BaseInstaller:
             print(f"  Error running command: {e}")
             return False
 
+    def _run_commands_parallel(self, cmds: List[List[str]], cwd: Optional[Path] = None) -> bool:
+        """Run independent shell commands concurrently."""
+        if len(cmds) <= 1:
+            return all(self._run_command(cmd, cwd) for cmd in cmds)
+
+        with ThreadPoolExecutor(max_workers=min(len(cmds), 4)) as pool:
+            results = list(pool.map(lambda cmd: self._run_command(cmd, cwd), cmds))
+        return all(results)
+
+    def _start_background(self, fn: Callable[..., bool], *args) -> None:
+        """Run fn(*args) in a worker thread while the installer continues."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._background.append(executor.submit(fn, *args))
+        executor.shutdown(wait=False)
+
+    def _wait_background(self) -> bool:
+        """Wait for all background work; True if every task succeeded."""
+        results = [future.result() for future in self._background]
+        self._background.clear()
+        return all(results)
+
     def _copy_template(self, template_name: str, dest_path: Path) -> bool:
         """Copy a template file to the destination."""
         template_path = self.templates.get_template_path(self.project.language) / template_name
@@ -468,7 +833,7 @@ class BaseInstaller:
         with open(dest_path, "w", encoding="utf-8") as f:
             f.write(content)
 
-        print(f"  Created: {dest_path.relative_to(self.project.project_root)}")
+        print(f"  Created: {str(dest_path)[self._root_prefix_len:]}")
         return True
 
     def _update_env_file(self, env_var: str = "SENTRY_DSN") -> bool:
@@ -487,27 +852,34 @@ class BaseInstaller:
 
     def _update_env_var(self, env_file: Path, var_name: str, value: str, only_if_missing: bool = False):
         """Update or add an environment variable in a .env file."""
-        lines = []
-        found = False
+        content = ""
+        match = None
 
         if env_file.exists():
             with open(env_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+                content = f.read()
+            match = _env_var_pattern(var_name).search(content)
 
-            for i, line in enumerate(lines):
-                if line.strip().startswith(f"{var_name}="):
-                    if not only_if_missing:
-                        lines[i] = f"{var_name}={value}\n"
-                    found = True
-                    break
+        if match:
+            # Leave the file (and its mtime) alone when the value is already
+            # set, or when an existing entry must not be overwritten
+            if only_if_missing or match.group(0).split("=", 1)[1] == value:
+                print(f"  Up to date: {env_file.name}")
+                return
 
-        if not found:
-            if lines and not lines[-1].endswith("\n"):
-                lines.append("\n")
-            lines.append(f"\n# Error Observability\n{var_name}={value}\n")
+            content = f"{content[:match.start()]}{var_name}={value}{content[match.end():]}"
+        else:
+            if content and not content.endswith("\n"):
+                content += "\n"
+            content += f"\n# Error Observability\n{var_name}={value}\n"
 
-        with open(env_file, "w", encoding="utf-8") as f:
-            f.writelines(lines)
+        # Write a sibling temp file and swap it in, so a crash never leaves a truncated file
+        tmp_file = env_file.with_name(f"{env_file.name}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        if env_file.exists():
+            shutil.copymode(env_file, tmp_file)
+        os.replace(tmp_file, env_file)
 
         print(f"  Updated: {env_file.name}")
 
@@ -520,11 +892,11 @@ class PythonInstaller(BaseInstaller):
 
         # Install package
         if self.project.package_manager == "poetry":
-            self._run_command(["poetry", "add", "sentry-sdk"])
+            self._start_background(self._run_command, ["poetry", "add", "sentry-sdk"])
         elif self.project.package_manager == "pipenv":
-            self._run_command(["pipenv", "install", "sentry-sdk"])
+            self._start_background(self._run_command, ["pipenv", "install", "sentry-sdk"])
         else:
-            self._run_command([sys.executable, "-m", "pip", "install", "sentry-sdk"])
+            self._start_background(self._run_command, [sys.executable, "-m", "pip", "install", "sentry-sdk"])
             # Add to requirements.txt if exists
             req_file = self.project.project_root / "requirements.txt"
             if req_file.exists():
@@ -538,6 +910,9 @@ class PythonInstaller(BaseInstaller):
         # Update .env
         self._update_env_file()
 
+        # Let the package manager finish before reporting completion
+        self._wait_background()
+
         print("\n  Integration complete!")
         print("  Add this to your application entry point:")
         print("  ─────────────────────────────────────────")
@@ -556,17 +931,21 @@ class PythonInstaller(BaseInstaller):
             with open(config_file, "r", encoding="utf-8") as f:
                 content = f.read()
 
+            # Cheap substring reject before running the regex
+            if "dsn" not in content:
+                return True
+
             # Replace DSN pattern
-            content = re.sub(
-                r'dsn\s*=\s*["\'][^"\']+["\']',
+            new_content = _DSN_PAT.sub(
                 f'dsn=os.getenv("SENTRY_DSN", "{self.config.dsn}")',
                 content
             )
 
-            with open(config_file, "w", encoding="utf-8") as f:
-                f.write(content)
+            if new_content != content:
+                with open(config_file, "w", encoding="utf-8") as f:
+                    f.write(new_content)
 
-            print(f"  Updated: sentry_config.py")
+                print(f"  Updated: sentry_config.py")
 
         return True
 
@@ -586,11 +965,11 @@ class NodeInstaller(BaseInstaller):
         packages = ["@sentry/node"]
 
         if self.project.package_manager == "pnpm":
-            self._run_command(["pnpm", "add"] + packages)
+            self._start_background(self._run_command, ["pnpm", "add"] + packages)
         elif self.project.package_manager == "yarn":
-            self._run_command(["yarn", "add"] + packages)
+            self._start_background(self._run_command, ["yarn", "add"] + packages)
         else:
-            self._run_command(["npm", "install", "--save"] + packages)
+            self._start_background(self._run_command, ["npm", "install", "--save"] + packages)
 
         # Copy template files
         if self.project.language == Language.TYPESCRIPT:
@@ -601,6 +980,9 @@ class NodeInstaller(BaseInstaller):
         # Update .env
         self._update_env_file()
 
+        # Let the package manager finish before reporting completion
+        self._wait_background()
+
         print("\n  Integration complete!")
         print("  Add this at the TOP of your entry file:")
         print("  ─────────────────────────────────────────")
@@ -633,8 +1015,7 @@ class DotNetInstaller(BaseInstaller):
         # Find .csproj file
         csproj_files = list(self.project.project_root.glob("**/*.csproj"))
         if csproj_files:
-            for csproj in csproj_files:
-                self._run_command(["dotnet", "add", str(csproj), "package", "Sentry"])
+            self._start_background(self._add_sentry_packages, csproj_files)
 
         # Copy template
         self._copy_template("SentryConfig.cs", self.project.project_root / "SentryConfig.cs")
@@ -642,6 +1023,9 @@ class DotNetInstaller(BaseInstaller):
         # Update environment
         self._update_env_file()
 
+        # Let the package manager finish before reporting completion
+        self._wait_background()
+
         print("\n  Integration complete!")
         print("  Add this to your Program.cs:")
         print("  ─────────────────────────────────────────")
@@ -660,6 +1044,30 @@ class DotNetInstaller(BaseInstaller):
         self._copy_template("SentryConfig.cs", self.project.project_root / "SentryConfig.cs")
         return True
 
+    def _add_sentry_packages(self, csproj_files: List[Path]) -> bool:
+        """Add the Sentry package to every project, then restore once.
+
+        The package references are added concurrently with --no-restore:
+        parallel restores of projects in one solution fight over shared
+        obj/project.assets.json files and the NuGet caches.
+        """
+        added = self._run_commands_parallel([
+            ["dotnet", "add", str(csproj), "package", "Sentry", "--no-restore"]
+            for csproj in csproj_files
+        ])
+
+        # A single solution in the root restores everything in one run;
+        # otherwise restore the projects one after another
+        solutions = list(self.project.project_root.glob("*.sln"))
+        if len(solutions) == 1:
+            restore_targets = solutions
+        else:
+            restore_targets = csproj_files
+        restored = True
+        for target in restore_targets:
+            restored = self._run_command(["dotnet", "restore", str(target)]) and restored
+        return added and restored
+
 
 class GoInstaller(BaseInstaller):
     """Installer for Go projects."""
@@ -667,12 +1075,15 @@ class GoInstaller(BaseInstaller):
     def install(self) -> bool:
         print("\n  Installing Sentry SDK for Go...")
 
-        self._run_command(["go", "get", "github.com/getsentry/sentry-go"])
+        self._start_background(self._run_command, ["go", "get", "github.com/getsentry/sentry-go"])
 
         self._copy_template("sentry.go", self.project.project_root / "pkg" / "sentry" / "sentry.go")
 
         self._update_env_file()
 
+        # Let the package manager finish before reporting completion
+        self._wait_background()
+
         print("\n  Integration complete!")
         print("  Add this to your main.go:")
         print("  ─────────────────────────────────────────")
@@ -702,12 +1113,15 @@ class PHPInstaller(BaseInstaller):
     def install(self) -> bool:
         print("\n  Installing Sentry SDK for PHP...")
 
-        self._run_command(["composer", "require", "sentry/sentry"])
+        self._start_background(self._run_command, ["composer", "require", "sentry/sentry"])
 
         self._copy_template("sentry.php", self.project.project_root / "config" / "sentry.php")
 
         self._update_env_file()
 
+        # Let the package manager finish before reporting completion
+        self._wait_background()
+
         print("\n  Integration complete!")
         print("  Add this to your bootstrap/entry file:")
         print("  ─────────────────────────────────────────")
@@ -737,12 +1151,15 @@ class RubyInstaller(BaseInstaller):
             with open(gemfile, "a", encoding="utf-8") as f:
                 f.write('\n\n# Error Observability\ngem "sentry-ruby"\n')
             print("  Added sentry-ruby to Gemfile")
-            self._run_command(["bundle", "install"])
+            self._start_background(self._run_command, ["bundle", "install"])
 
         self._copy_template("sentry.rb", self.project.project_root / "config" / "initializers" / "sentry.rb")
 
         self._update_env_file()
 
+        # Let the package manager finish before reporting completion
+        self._wait_background()
+
         print("\n  Integration complete!")
         print("  For Rails: The initializer will load automatically.")
         print("  For other apps, add:")
@@ -810,10 +1227,59 @@ class JavaInstaller(BaseInstaller):
 # MAIN INSTALLER
 # =============================================================================
 
+# Resolved once at import, before any --project-root chdir
+_SCRIPT_DIR = Path(__file__).resolve().parent
+_TEMPLATES_DIR = _SCRIPT_DIR / "templates"
+
+# Shared so its template caches persist across installer instances
+_TEMPLATE_MANAGER = TemplateManager(_TEMPLATES_DIR)
+
+# Static output blocks, each written with a single call
+_BANNER = (
+    "=" * 60 + "\n"
+    "  Error Observability - Client Kit Installer\n"
+    + "=" * 60 + "\n"
+)
+
+_MENU = (
+    "\n  What would you like to do?\n"
+    "  ─────────────────────────────────────────\n"
+    "  1. Set up new integration\n"
+    "  2. Update DSN only\n"
+    "  3. Update client code from templates\n"
+    "  4. Exit\n"
+    "\n"
+)
+
+
+def _prompt(message: str) -> str:
+    """Prompt for one line of input and return it stripped.
+
+    Piped (non-TTY) stdin is read with a single readline() and yields ""
+    at end of input instead of raising EOFError; terminals keep input()
+    for line editing.
+    """
+    if not sys.stdin.isatty():
+        sys.stdout.write(message)
+        sys.stdout.flush()
+        return sys.stdin.readline().strip()
+    return input(message).strip()
+
+
+_NUM_RE = re.compile(r"\d+")
+
+
+def _menu_index(choice: str) -> Optional[int]:
+    """Return the zero-based index for a numeric menu choice, else None."""
+    match = _NUM_RE.fullmatch(choice)
+    return int(match.group()) - 1 if match else None
+
+
 class ClientKitInstaller:
     """Main installer orchestrator."""
 
-    INSTALLERS = {
+    # Read-only dispatch table: language -> installer class
+    INSTALLERS = MappingProxyType({
         Language.PYTHON: PythonInstaller,
         Language.NODEJS: NodeInstaller,
         Language.TYPESCRIPT: NodeInstaller,
@@ -822,34 +1288,35 @@ class ClientKitInstaller:
         Language.GO: GoInstaller,
         Language.PHP: PHPInstaller,
         Language.RUBY: RubyInstaller,
-    }
+    })
 
     def __init__(self):
-        # Determine paths
-        self.script_dir = Path(__file__).parent.resolve()
-        self.templates_dir = self.script_dir / "templates"
+        # Determine paths (project root stays dynamic: --project-root chdirs)
+        self.script_dir = _SCRIPT_DIR
+        self.templates_dir = _TEMPLATES_DIR
         self.project_root = Path.cwd()
 
-        self.templates = TemplateManager(self.templates_dir)
+        self.templates = _TEMPLATE_MANAGER
         self.project: Optional[ProjectInfo] = None
         self.config: Optional[SentryConfig] = None
         self.api: Optional[BugsinkAPI] = None
 
     def run(self, args: argparse.Namespace):
         """Run the installer based on arguments."""
-        print("=" * 60)
-        print("  Error Observability - Client Kit Installer")
-        print("=" * 60)
+        sys.stdout.write(_BANNER)
 
         # Detect project
         self.project = LanguageDetector.detect(self.project_root)
 
-        print(f"\n  Project: {self.project.project_name}")
-        print(f"  Language: {self.project.language.value}")
+        info = (
+            f"\n  Project: {self.project.project_name}\n"
+            f"  Language: {self.project.language.value}\n"
+        )
         if self.project.framework:
-            print(f"  Framework: {self.project.framework}")
+            info += f"  Framework: {self.project.framework}\n"
         if self.project.package_manager:
-            print(f"  Package Manager: {self.project.package_manager}")
+            info += f"  Package Manager: {self.project.package_manager}\n"
+        sys.stdout.write(info)
 
         if self.project.language == Language.UNKNOWN:
             print("\n  Error: Could not detect project language.")
@@ -900,6 +1367,13 @@ class ClientKitInstaller:
         print("\n  API Mode: Automatic project setup")
         print("  ─────────────────────────────────────────")
 
+        # Load the project listing in the background while the user picks a
+        # team. The team listing shown below comes from the cache filled by
+        # test_connection(), and any request would wait for the prefetch on
+        # the client's lock; project lookups only start after the join.
+        prefetch = threading.Thread(target=self.api.prefetch, daemon=True)
+        prefetch.start()
+
         # Get team name - from args, env, or prompt
         team_name = args.team or os.getenv("BUGSINK_TEAM")
         if not team_name:
@@ -912,18 +1386,20 @@ class ClientKitInstaller:
                 print(f"    {len(teams) + 1}. Create new team")
                 print("")
 
-                choice = input("  Select team number or enter new team name: ").strip()
+                choice = _prompt("  Select team number or enter new team name: ")
 
-                if choice.isdigit():
-                    idx = int(choice) - 1
+                idx = _menu_index(choice)
+                if idx is not None:
                     if 0 <= idx < len(teams):
                         team_name = teams[idx].get("name")
                     elif idx == len(teams):
-                        team_name = input("  Enter new team name: ").strip()
+                        team_name = _prompt("  Enter new team name: ")
                 else:
                     team_name = choice
             else:
-                team_name = input("  Enter team name: ").strip()
+                team_name = _prompt("  Enter team name: ")
+
+        prefetch.join()
 
         if not team_name:
             print("  Error: Team name is required.")
@@ -950,14 +1426,14 @@ class ClientKitInstaller:
             print("")
 
             default_msg = f" (default: {project_name})" if project_name else ""
-            choice = input(f"  Select project number or enter new name{default_msg}: ").strip()
+            choice = _prompt(f"  Select project number or enter new name{default_msg}: ")
 
-            if choice.isdigit():
-                idx = int(choice) - 1
+            idx = _menu_index(choice)
+            if idx is not None:
                 if 0 <= idx < len(projects):
                     project_name = projects[idx].get("name")
                 elif idx == len(projects):
-                    new_name = input(f"  Enter new project name [{project_name}]: ").strip()
+                    new_name = _prompt(f"  Enter new project name [{project_name}]: ")
                     if new_name:
                         project_name = new_name
             elif choice:
@@ -988,20 +1464,14 @@ class ClientKitInstaller:
         print("\n  DSN not found in environment.")
         print("  Get your DSN from: Project Settings > Client Keys")
         print("")
-        dsn = input("  Enter DSN (or press Enter to skip): ").strip()
+        dsn = _prompt("  Enter DSN (or press Enter to skip): ")
         return dsn
 
     def _interactive_menu(self) -> int:
         """Show interactive menu."""
-        print("\n  What would you like to do?")
-        print("  ─────────────────────────────────────────")
-        print("  1. Set up new integration")
-        print("  2. Update DSN only")
-        print("  3. Update client code from templates")
-        print("  4. Exit")
-        print("")
+        sys.stdout.write(_MENU)
 
-        choice = input("  Enter choice [1-4]: ").strip()
+        choice = _prompt("  Enter choice [1-4]: ")
 
         if choice == "1":
             return self._install()
@@ -1060,11 +1530,8 @@ class ClientKitInstaller:
             dsn = os.getenv("SENTRY_DSN", "")
             env_file = self.project.project_root / ".env"
             if env_file.exists():
-                with open(env_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.startswith("SENTRY_DSN="):
-                            dsn = line.split("=", 1)[1].strip()
-                            break
+                env_values = _read_env_values(str(env_file))
+                dsn = env_values.get("SENTRY_DSN", dsn)
 
             self.config = SentryConfig(dsn=dsn)
 
@@ -1085,7 +1552,8 @@ class ClientKitInstaller:
 # CLI
 # =============================================================================
 
-def main():
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
     parser = argparse.ArgumentParser(
         description="Error Observability Client Kit - SDK Integration Tool",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1157,7 +1625,11 @@ Environment Variables:
         help="Project name for API mode (creates if not exists)"
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    args = _build_parser().parse_args()
 
     if args.project_root:
         os.chdir(args.project_root)
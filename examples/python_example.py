@@ -14,9 +14,9 @@ DSN Format:
 """
 
 import os
+import re
 import sys
 import logging
-from datetime import datetime
 from functools import wraps
 
 import sentry_sdk
@@ -33,27 +33,52 @@ SENTRY_DSN = os.getenv(
     "https://your-project-key@errors.observability.app.bauer-group.com/1"
 )
 
+# Bugsink host part of the DSN, used in status output
+_BUGSINK_HOST = SENTRY_DSN.partition("@")[2].partition("/")[0]
+
 # Environment configuration
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 RELEASE = os.getenv("APP_VERSION", "1.0.0")
 SERVER_NAME = os.getenv("HOSTNAME", "unknown")
 
+# Request headers redacted by before_send_handler
+SENSITIVE_HEADERS = frozenset({"Authorization", "Cookie", "X-API-Key"})
+
+# Same names plus their lowercase form (HTTP/2, many WSGI/ASGI servers)
+_SENSITIVE_HEADER_KEYS = SENSITIVE_HEADERS | {header.lower() for header in SENSITIVE_HEADERS}
+
+# Query breadcrumbs matching this are redacted by before_breadcrumb_handler
+SENSITIVE_QUERY_RE = re.compile(r"password", re.IGNORECASE)
+
+# Custom grouping: exception type -> fingerprint
+FINGERPRINT_RULES = {
+    "DatabaseConnectionError": ["database-connection-error"],
+}
+
 
 # =============================================================================
 # SENTRY INITIALIZATION
 # =============================================================================
 
+# Integrations are created once and reused by every init_sentry() call
+LOGGING_INTEGRATION = LoggingIntegration(
+    level=logging.INFO,        # Capture INFO and above as breadcrumbs
+    event_level=logging.ERROR  # Send ERROR and above as events
+)
+THREADING_INTEGRATION = ThreadingIntegration(propagate_hub=True)
+
+# DSN the SDK was initialized with by init_sentry(), if any
+_initialized_dsn = None
+
+
 def init_sentry():
     """
     Initialize Sentry SDK with comprehensive configuration.
-    Call this once at application startup.
+    Call this once at application startup; repeated calls are no-ops.
     """
-
-    # Configure logging integration
-    logging_integration = LoggingIntegration(
-        level=logging.INFO,        # Capture INFO and above as breadcrumbs
-        event_level=logging.ERROR  # Send ERROR and above as events
-    )
+    global _initialized_dsn
+    if _initialized_dsn == SENTRY_DSN:
+        return
 
     sentry_sdk.init(
         dsn=SENTRY_DSN,
@@ -65,8 +90,8 @@ def init_sentry():
 
         # Integrations
         integrations=[
-            logging_integration,
-            ThreadingIntegration(propagate_hub=True),
+            LOGGING_INTEGRATION,
+            THREADING_INTEGRATION,
         ],
 
         # Performance Monitoring
@@ -98,6 +123,8 @@ def init_sentry():
     sentry_sdk.set_tag("app.component", "backend")
     sentry_sdk.set_tag("app.team", "platform")
 
+    _initialized_dsn = SENTRY_DSN
+
     print(f"Sentry initialized for environment: {ENVIRONMENT}")
 
 
@@ -107,25 +134,25 @@ def before_send_handler(event, hint):
     Use this to sanitize sensitive data or filter events.
     """
     # Example: Remove sensitive headers
-    if "request" in event and "headers" in event["request"]:
-        headers = event["request"]["headers"]
-        sensitive_headers = ["Authorization", "Cookie", "X-API-Key"]
-        for header in sensitive_headers:
-            if header in headers:
-                headers[header] = "[REDACTED]"
+    headers = event.get("request", {}).get("headers")
+    if headers:
+        for header in headers.keys() & _SENSITIVE_HEADER_KEYS:
+            headers[header] = "[REDACTED]"
+
+    exceptions = event.get("exception", {}).get("values")
+    if not exceptions:
+        return event
 
     # Example: Filter out specific exceptions
-    if "exception" in event:
-        for exception in event["exception"].get("values", []):
-            # Don't send expected/handled exceptions
-            if exception.get("type") == "ExpectedBusinessException":
-                return None
+    for exception in exceptions:
+        # Don't send expected/handled exceptions
+        if exception.get("type") == "ExpectedBusinessException":
+            return None
 
     # Example: Add custom fingerprint for grouping
-    if "exception" in event:
-        exc_type = event["exception"]["values"][0].get("type", "")
-        if exc_type == "DatabaseConnectionError":
-            event["fingerprint"] = ["database-connection-error"]
+    fingerprint = FINGERPRINT_RULES.get(exceptions[0].get("type", ""))
+    if fingerprint:
+        event["fingerprint"] = fingerprint
 
     return event
 
@@ -135,14 +162,19 @@ def before_breadcrumb_handler(breadcrumb, hint):
     Process breadcrumbs before adding to the event.
     Use this to filter or sanitize breadcrumb data.
     """
+    category = breadcrumb.get("category")
+
     # Filter out noisy breadcrumbs
-    if breadcrumb.get("category") == "httplib" and "/health" in breadcrumb.get("data", {}).get("url", ""):
-        return None
+    if category == "httplib":
+        data = breadcrumb.get("data")
+        url = data.get("url") if data else None
+        if url and "/health" in url:
+            return None
 
     # Sanitize SQL queries
-    if breadcrumb.get("category") == "query":
-        message = breadcrumb.get("message", "")
-        if "password" in message.lower():
+    elif category == "query":
+        message = breadcrumb.get("message")
+        if message and SENSITIVE_QUERY_RE.search(message):
             breadcrumb["message"] = "[QUERY REDACTED - CONTAINS SENSITIVE DATA]"
 
     return breadcrumb
@@ -183,14 +215,12 @@ def add_breadcrumb(message: str, category: str = "custom", level: str = "info",
     """
     Add a breadcrumb to track user actions/events.
     Breadcrumbs help understand what happened before an error.
+    The SDK stamps the breadcrumb with the current (UTC) time.
     """
-    sentry_sdk.add_breadcrumb(
-        message=message,
-        category=category,
-        level=level,
-        data=data or {},
-        timestamp=datetime.now()
-    )
+    crumb = {"message": message, "category": category, "level": level}
+    if data is not None:
+        crumb["data"] = data  # omitted otherwise, so no "data": null is sent
+    sentry_sdk.add_breadcrumb(crumb)
 
 
 # =============================================================================
@@ -205,15 +235,8 @@ def capture_exception(exception: Exception = None, **extra_context):
         exception: The exception to capture (or None to capture current)
         **extra_context: Additional context to attach
     """
-    with sentry_sdk.push_scope() as scope:
-        # Add extra context
-        for key, value in extra_context.items():
-            scope.set_extra(key, value)
-
-        if exception:
-            sentry_sdk.capture_exception(exception)
-        else:
-            sentry_sdk.capture_exception()
+    # Extra context applies to this event only; no scope needs to be pushed
+    sentry_sdk.capture_exception(exception, extras=extra_context)
 
 
 def capture_message(message: str, level: str = "info", **extra_context):
@@ -225,11 +248,7 @@ def capture_message(message: str, level: str = "info", **extra_context):
         level: Severity level (debug, info, warning, error, fatal)
         **extra_context: Additional context to attach
     """
-    with sentry_sdk.push_scope() as scope:
-        for key, value in extra_context.items():
-            scope.set_extra(key, value)
-
-        sentry_sdk.capture_message(message, level=level)
+    sentry_sdk.capture_message(message, level=level, extras=extra_context)
 
 
 # =============================================================================
@@ -246,17 +265,20 @@ def track_errors(operation_name: str = None):
             ...
     """
     def decorator(func):
+        # Computed once at decoration time, not on every call
+        op_name = operation_name or func.__name__
+        func_name = func.__name__
+        breadcrumb_message = f"Executing {op_name}"
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            op_name = operation_name or func.__name__
-
             with sentry_sdk.push_scope() as scope:
                 scope.set_tag("operation", op_name)
-                scope.set_extra("function", func.__name__)
+                scope.set_extra("function", func_name)
                 scope.set_extra("args_count", len(args))
 
                 add_breadcrumb(
-                    message=f"Executing {op_name}",
+                    message=breadcrumb_message,
                     category="function",
                     level="info"
                 )
@@ -311,7 +333,7 @@ def create_flask_app():
         print("Flask not installed. Run: pip install flask")
         return None
 
-    # Re-initialize with Flask integration
+    # Re-initialize with Flask integration (integrations are only set up by init)
     sentry_sdk.init(
         dsn=SENTRY_DSN,
         environment=ENVIRONMENT,
@@ -410,6 +432,14 @@ async def async_capture_example():
 # MAIN EXAMPLE
 # =============================================================================
 
+# Spans recorded by the manual transaction example: (op, description, duration)
+_ORDER_SPANS = (
+    ("db.query", "Fetch order", 0.05),
+    ("http.client", "Payment API", 0.1),
+    ("db.query", "Update order status", 0.05),
+)
+
+
 def main():
     """
     Demonstration of all Sentry integration features.
@@ -495,16 +525,11 @@ def main():
 
     # Example 6: Manual transaction with spans
     print("\n6. Creating transaction with spans...")
+    import time
     with sentry_sdk.start_transaction(name="order_processing", op="task") as txn:
-        with txn.start_child(op="db.query", description="Fetch order"):
-            import time
-            time.sleep(0.05)
-
-        with txn.start_child(op="http.client", description="Payment API"):
-            time.sleep(0.1)
-
-        with txn.start_child(op="db.query", description="Update order status"):
-            time.sleep(0.05)
+        for op, description, duration in _ORDER_SPANS:
+            with txn.start_child(op=op, description=description):
+                time.sleep(duration)  # Simulate work
 
         txn.set_status("ok")
     print("   Transaction with spans recorded")
@@ -514,7 +539,7 @@ def main():
 
     print("\n" + "=" * 60)
     print("All examples completed!")
-    print(f"Check your Bugsink dashboard at: https://{SENTRY_DSN.split('@')[1].split('/')[0]}")
+    print(f"Check your Bugsink dashboard at: https://{_BUGSINK_HOST}")
     print("=" * 60)
 
     # Flush events before exit
@@ -23,9 +23,21 @@ Setup (Fine-grained Token - Recommended):
 """
 
 import json
+import re
+import threading
+from functools import lru_cache
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from django import forms
+from django.apps import apps
 from django.utils import timezone
 
 from snappea.decorators import shared_task
@@ -37,6 +49,50 @@ from issues.models import Issue
 
 GITHUB_API_URL = "https://api.github.com"
 
+# Longest a request may wait between retries, including a server's Retry-After
+RETRY_WAIT_MAX = 5
+
+
+class _BoundedRetry(Retry):
+    """Retry policy that never waits longer than RETRY_WAIT_MAX seconds.
+
+    urllib3 would otherwise honour a Retry-After of up to six hours and keep
+    the Snappea worker thread blocked for that long.
+    """
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RETRY_WAIT_MAX)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+# MessagingServiceConfig columns written by the failure tracking helpers;
+# only these are loaded and saved, leaving the config JSON untouched
+_FAILURE_FIELDS = (
+    "last_failure_timestamp",
+    "last_failure_error_type",
+    "last_failure_error_message",
+    "last_failure_status_code",
+    "last_failure_response_text",
+    "last_failure_is_json",
+)
+
+_MessagingServiceConfig = None
+
+# (repository, Bugsink issue id) -> GitHub issue number, for issues created
+# by this worker process; repeat alerts are added as comments to that issue
+_ISSUE_NUMBERS = {}
+_ISSUE_NUMBERS_MAX = 1024
+_issue_numbers_lock = threading.Lock()
+
+
+# One item of a comma-separated list, without surrounding whitespace
+_LIST_ITEM_RE = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
+
 
 class GitHubIssuesConfigForm(forms.Form):
     """Configuration form for GitHub Issues integration."""
@@ -72,15 +128,23 @@ class GitHubIssuesConfigForm(forms.Form):
         initial="new_only",
     )
 
+    # (field name, default) pairs used to prefill the form from a stored config
+    _INITIAL_DEFAULTS = (
+        ("repository", ""),
+        ("access_token", ""),
+        ("labels", []),
+        ("assignees", []),
+        ("alert_filter", "new_only"),
+    )
+
     def __init__(self, *args, **kwargs):
         config = kwargs.pop("config", None)
         super().__init__(*args, **kwargs)
         if config:
-            self.fields["repository"].initial = config.get("repository", "")
-            self.fields["access_token"].initial = config.get("access_token", "")
-            self.fields["labels"].initial = ",".join(config.get("labels", []))
-            self.fields["assignees"].initial = ",".join(config.get("assignees", []))
-            self.fields["alert_filter"].initial = config.get("alert_filter", "new_only")
+            fields = self.fields
+            for name, default in self._INITIAL_DEFAULTS:
+                value = config.get(name, default)
+                fields[name].initial = ",".join(value) if isinstance(value, list) else value
 
     def clean_repository(self):
         repo = self.cleaned_data["repository"].strip()
@@ -95,19 +159,65 @@ class GitHubIssuesConfigForm(forms.Form):
         return {
             "repository": self.cleaned_data["repository"],
             "access_token": self.cleaned_data["access_token"],
-            "labels": [l.strip() for l in self.cleaned_data.get("labels", "").split(",") if l.strip()],
-            "assignees": [a.strip() for a in self.cleaned_data.get("assignees", "").split(",") if a.strip()],
+            "labels": _LIST_ITEM_RE.findall(self.cleaned_data.get("labels", "")),
+            "assignees": _LIST_ITEM_RE.findall(self.cleaned_data.get("assignees", "")),
             "alert_filter": self.cleaned_data.get("alert_filter", "new_only"),
         }
 
 
+def _json_dumps(obj):
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data):
+    """Parse JSON from bytes or str (raises ValueError on bad input)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=128)
+def _parse_config(raw_config):
+    """Parse a stored service config, memoized on the raw JSON text.
+
+    Keying on the text itself means an edited config is simply a new cache
+    entry. The returned dict is shared and must not be modified.
+    """
+    return _json_loads(raw_config)
+
+
+def _get_service_config_model():
+    """Return the MessagingServiceConfig model, resolved once per process.
+
+    alerts.models imports this module to register the backend, so the model
+    cannot be imported at module level.
+    """
+    global _MessagingServiceConfig
+    if _MessagingServiceConfig is None:
+        _MessagingServiceConfig = apps.get_model("alerts", "MessagingServiceConfig")
+    return _MessagingServiceConfig
+
+
+def _load_config(service_config_id):
+    """Load and parse a service config in the worker; None if it was deleted."""
+    MessagingServiceConfig = _get_service_config_model()
+    try:
+        service_config = MessagingServiceConfig.objects.only("config").get(id=service_config_id)
+    except MessagingServiceConfig.DoesNotExist:
+        return None
+    return _parse_config(service_config.config)
+
+
 def _store_failure_info(service_config_id, exception, response=None):
     """Store failure information in the MessagingServiceConfig."""
-    from alerts.models import MessagingServiceConfig
+    MessagingServiceConfig = _get_service_config_model()
 
     with immediate_atomic(only_if_needed=True):
         try:
-            config = MessagingServiceConfig.objects.get(id=service_config_id)
+            config = MessagingServiceConfig.objects.only(*_FAILURE_FIELDS).get(id=service_config_id)
 
             config.last_failure_timestamp = timezone.now()
             config.last_failure_error_type = type(exception).__name__
@@ -118,7 +228,7 @@ def _store_failure_info(service_config_id, exception, response=None):
                 config.last_failure_response_text = response.text[:2000]
 
                 try:
-                    json.loads(response.text)
+                    _json_loads(response.content)
                     config.last_failure_is_json = True
                 except (json.JSONDecodeError, ValueError):
                     config.last_failure_is_json = False
@@ -127,28 +237,111 @@ def _store_failure_info(service_config_id, exception, response=None):
                 config.last_failure_response_text = None
                 config.last_failure_is_json = None
 
-            config.save()
+            config.save(update_fields=_FAILURE_FIELDS)
         except MessagingServiceConfig.DoesNotExist:
             pass  # Config was deleted, nothing to update
 
 
 def _store_success_info(service_config_id):
-    """Clear failure information on successful operation."""
-    from alerts.models import MessagingServiceConfig
+    """Clear failure information on successful operation.
+
+    The row is only written when a failure is actually recorded, so the
+    common case of consecutive successes costs a single primary-key read.
+    """
+    MessagingServiceConfig = _get_service_config_model()
 
     with immediate_atomic(only_if_needed=True):
         try:
-            config = MessagingServiceConfig.objects.get(id=service_config_id)
-            config.clear_failure_status()
-            config.save()
+            config = MessagingServiceConfig.objects.only(*_FAILURE_FIELDS).get(id=service_config_id)
+            if config.last_failure_timestamp is not None:
+                config.clear_failure_status()
+                config.save(update_fields=_FAILURE_FIELDS)
         except MessagingServiceConfig.DoesNotExist:
             pass  # Config was deleted, nothing to update
 
 
+def _get_session():
+    """Return the shared HTTP session for GitHub API calls.
+
+    The session is created on first use and kept for the lifetime of the
+    worker process, so consecutive tasks reuse the pooled keep-alive
+    connection to api.github.com instead of a new TLS handshake each time.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Backoff with jitter on rate limits and overload. A POST is only
+                # retried on statuses where the server did not process it
+                # (429, 503), never after a read timeout or other 5xx: the
+                # issue may already exist. Waits are capped so a long
+                # Retry-After fails the task instead of blocking the worker.
+                retry = _BoundedRetry(
+                    total=3,
+                    read=0,
+                    backoff_factor=0.5,
+                    backoff_jitter=0.25,
+                    backoff_max=RETRY_WAIT_MAX,
+                    status_forcelist=[429, 503],
+                    respect_retry_after_header=True,
+                    allowed_methods=["POST"],
+                    raise_on_status=False,  # hand the last response to raise_for_status()
+                )
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+                _session = session
+    return _session
+
+
+def _get_headers(access_token):
+    """Request headers for the GitHub REST API."""
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/vnd.github+json",
+        "Content-Type": "application/json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+
+
+def _remember_issue_number(key, number):
+    """Remember the GitHub issue created for a Bugsink issue."""
+    with _issue_numbers_lock:
+        _ISSUE_NUMBERS.pop(key, None)
+        if len(_ISSUE_NUMBERS) >= _ISSUE_NUMBERS_MAX:
+            del _ISSUE_NUMBERS[next(iter(_ISSUE_NUMBERS))]  # drop the oldest entry
+        _ISSUE_NUMBERS[key] = number
+
+
+def _get_open_issue_number(session, repository, key, headers):
+    """Return the remembered GitHub issue number if that issue is still open."""
+    number = _ISSUE_NUMBERS.get(key)
+    if number is None:
+        return None
+
+    try:
+        result = session.get(f"{GITHUB_API_URL}/repos/{repository}/issues/{number}", headers=headers, timeout=5)
+        if result.ok and _json_loads(result.content).get("state") == "open":
+            return number
+    except (requests.RequestException, ValueError):
+        return None  # Lookup failed; fall back to creating a new issue
+
+    with _issue_numbers_lock:
+        _ISSUE_NUMBERS.pop(key, None)
+    return None
+
+
 @shared_task
-def github_issues_send_test_message(repository, access_token, labels, assignees,
-                                     project_name, display_name, service_config_id):
+def github_issues_send_test_message(project_name, display_name, service_config_id):
     """Send a test issue to verify GitHub configuration."""
+    config = _load_config(service_config_id)
+    if config is None:
+        return  # Config was deleted, nothing to send
+
+    repository = config["repository"]
+    access_token = config["access_token"]
+    labels = config.get("labels", [])
+    assignees = config.get("assignees", [])
+
     url = f"{GITHUB_API_URL}/repos/{repository}/issues"
 
     payload = {
@@ -171,15 +364,10 @@ def github_issues_send_test_message(repository, access_token, labels, assignees,
         payload["assignees"] = assignees
 
     try:
-        result = requests.post(
+        result = _get_session().post(
             url,
-            data=json.dumps(payload),
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/vnd.github+json",
-                "Content-Type": "application/json",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
+            data=_json_dumps(payload),
+            headers=_get_headers(access_token),
             timeout=5,
         )
         result.raise_for_status()
@@ -194,11 +382,23 @@ def github_issues_send_test_message(repository, access_token, labels, assignees,
 
 
 @shared_task
-def github_issues_send_alert(repository, access_token, labels, assignees,
-                              issue_id, state_description, alert_article, alert_reason,
+def github_issues_send_alert(issue_id, state_description, alert_article, alert_reason,
                               service_config_id, unmute_reason=None):
-    """Create a GitHub issue for a Bugsink alert."""
-    issue = Issue.objects.get(id=issue_id)
+    """Create a GitHub issue for a Bugsink alert.
+
+    If this worker already created a GitHub issue for the same Bugsink issue
+    and it is still open, the alert is posted as a comment on it instead.
+    """
+    config = _load_config(service_config_id)
+    if config is None:
+        return  # Config was deleted, nothing to send
+
+    repository = config["repository"]
+    access_token = config["access_token"]
+    labels = config.get("labels", [])
+    assignees = config.get("assignees", [])
+
+    issue = Issue.objects.select_related("project").get(id=issue_id)
     issue_url = get_settings().BASE_URL + issue.get_absolute_url()
 
     title = f"[{state_description}] {issue.calculated_type or 'Error'}: {issue.calculated_value or 'Unknown'}"
@@ -241,19 +441,27 @@ def github_issues_send_alert(repository, access_token, labels, assignees,
     if assignees:
         payload["assignees"] = assignees
 
+    headers = _get_headers(access_token)
+    key = (repository, str(issue_id))
+
     try:
-        result = requests.post(
-            url,
-            data=json.dumps(payload),
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/vnd.github+json",
-                "Content-Type": "application/json",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-            timeout=5,
-        )
-        result.raise_for_status()
+        session = _get_session()
+        number = _get_open_issue_number(session, repository, key, headers)
+        if number is not None:
+            comment = (
+                f"**{state_description}:** {alert_reason}\n\n"
+                f"- **Last Seen:** {issue.last_seen.isoformat() if issue.last_seen else 'Unknown'}\n"
+                f"- **Event Count:** {issue.digested_event_count}\n"
+            )
+            if unmute_reason:
+                comment += f"- **Unmute Reason:** {unmute_reason}\n"
+            comment += f"\n**View in Bugsink:** [{issue_url}]({issue_url})"
+            result = session.post(f"{url}/{number}/comments", data=_json_dumps({"body": comment}), headers=headers, timeout=5)
+            result.raise_for_status()
+        else:
+            result = session.post(url, data=_json_dumps(payload), headers=headers, timeout=5)
+            result.raise_for_status()
+            _remember_issue_number(key, _json_loads(result.content)["number"])
         _store_success_info(service_config_id)
 
     except requests.RequestException as e:
@@ -275,29 +483,22 @@ class GitHubIssuesBackend:
         return GitHubIssuesConfigForm
 
     def send_test_message(self):
-        config = json.loads(self.service_config.config)
+        # Only the config id travels through the task queue; the worker
+        # loads the config (including the access token) itself
         github_issues_send_test_message.delay(
-            config["repository"],
-            config["access_token"],
-            config.get("labels", []),
-            config.get("assignees", []),
             self.service_config.project.name,
             self.service_config.display_name,
             self.service_config.id,
         )
 
     def send_alert(self, issue_id, state_description, alert_article, alert_reason, **kwargs):
-        config = json.loads(self.service_config.config)
+        config = _parse_config(self.service_config.config)
 
         # Check alert filter
         if config.get("alert_filter", "new_only") == "new_only" and state_description != "NEW":
             return
 
         github_issues_send_alert.delay(
-            config["repository"],
-            config["access_token"],
-            config.get("labels", []),
-            config.get("assignees", []),
             issue_id,
             state_description,
             alert_article,
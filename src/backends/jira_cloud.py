@@ -18,10 +18,22 @@ Setup:
 """
 
 import json
-import requests
+import re
+import threading
 from base64 import b64encode
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from django import forms
+from django.apps import apps
 from django.utils import timezone
 
 from snappea.decorators import shared_task
@@ -42,6 +54,62 @@ JIRA_ISSUE_TYPE_CHOICES = [
     ("New Feature", "New Feature"),
 ]
 
+# Plain-text body of the alert ticket description
+_DESCRIPTION_TEMPLATE = (
+    "Error Type: {error_type}\n"
+    "Error Message: {error_message}\n"
+    "\n"
+    "View in Bugsink: {issue_url}\n"
+    "\n"
+    "First Seen: {first_seen}\n"
+    "Last Seen: {last_seen}\n"
+    "Event Count: {event_count}\n"
+    "\n"
+    "Project: {project}\n"
+    "Alert Type: {state_description}\n"
+    "Reason: {alert_reason}"
+)
+
+# Longest a request may wait between retries, including a server's Retry-After
+RETRY_WAIT_MAX = 5
+
+
+class _BoundedRetry(Retry):
+    """Retry policy that never waits longer than RETRY_WAIT_MAX seconds.
+
+    urllib3 would otherwise honour a Retry-After of up to six hours and keep
+    the Snappea worker thread blocked for that long.
+    """
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RETRY_WAIT_MAX)
+
+
+# One HTTP session per (jira_url, user_email, api_token), kept for the
+# lifetime of the worker process
+_SESSION_CACHE = {}
+_session_lock = threading.Lock()
+
+# MessagingServiceConfig columns written by the failure tracking helpers;
+# only these are loaded and saved, leaving the config JSON untouched
+_FAILURE_FIELDS = (
+    "last_failure_timestamp",
+    "last_failure_error_type",
+    "last_failure_error_message",
+    "last_failure_status_code",
+    "last_failure_response_text",
+    "last_failure_is_json",
+)
+
+_MessagingServiceConfig = None
+
+
+# One item of a comma-separated list, without surrounding whitespace
+_LIST_ITEM_RE = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
+
 
 class JiraCloudConfigForm(forms.Form):
     """Configuration form for Jira Cloud integration."""
@@ -87,17 +155,25 @@ class JiraCloudConfigForm(forms.Form):
         initial="new_only",
     )
 
+    # (field name, default) pairs used to prefill the form from a stored config
+    _INITIAL_DEFAULTS = (
+        ("jira_url", ""),
+        ("user_email", ""),
+        ("api_token", ""),
+        ("project_key", "PROJ"),
+        ("issue_type", "Bug"),
+        ("labels", []),
+        ("alert_filter", "new_only"),
+    )
+
     def __init__(self, *args, **kwargs):
         config = kwargs.pop("config", None)
         super().__init__(*args, **kwargs)
         if config:
-            self.fields["jira_url"].initial = config.get("jira_url", "")
-            self.fields["user_email"].initial = config.get("user_email", "")
-            self.fields["api_token"].initial = config.get("api_token", "")
-            self.fields["project_key"].initial = config.get("project_key", "PROJ")
-            self.fields["issue_type"].initial = config.get("issue_type", "Bug")
-            self.fields["labels"].initial = ",".join(config.get("labels", []))
-            self.fields["alert_filter"].initial = config.get("alert_filter", "new_only")
+            fields = self.fields
+            for name, default in self._INITIAL_DEFAULTS:
+                value = config.get(name, default)
+                fields[name].initial = ",".join(value) if isinstance(value, list) else value
 
     def get_config(self):
         return {
@@ -106,25 +182,105 @@ class JiraCloudConfigForm(forms.Form):
             "api_token": self.cleaned_data["api_token"],
             "project_key": self.cleaned_data["project_key"],
             "issue_type": self.cleaned_data["issue_type"],
-            "labels": [label.strip() for label in self.cleaned_data.get("labels", "").split(",") if label.strip()],
+            "labels": _LIST_ITEM_RE.findall(self.cleaned_data.get("labels", "")),
             "alert_filter": self.cleaned_data.get("alert_filter", "new_only"),
         }
 
 
-def _get_auth_header(email: str, api_token: str) -> str:
-    """Create Basic Auth header for Jira API."""
-    credentials = f"{email}:{api_token}"
-    encoded = b64encode(credentials.encode()).decode()
-    return f"Basic {encoded}"
+def _get_jira_session(jira_url, user_email, api_token):
+    """Return the shared HTTP session for a Jira site and account.
+
+    Reusing the session keeps the TLS connection to the Jira site alive
+    across tasks. The Basic Auth header is encoded once when the session is
+    created; requests' HTTPBasicAuth would re-encode it on every request.
+    """
+    key = (jira_url, user_email, api_token)
+    session = _SESSION_CACHE.get(key)
+    if session is None:
+        with _session_lock:
+            session = _SESSION_CACHE.get(key)
+            if session is None:
+                # Backoff with jitter on rate limits and overload. A POST is only
+                # retried on statuses where the server did not process it
+                # (429, 503), never after a read timeout or other 5xx: the
+                # issue may already exist. Waits are capped so a long
+                # Retry-After fails the task instead of blocking the worker.
+                retry = _BoundedRetry(
+                    total=3,
+                    read=0,
+                    backoff_factor=0.5,
+                    backoff_jitter=0.25,
+                    backoff_max=RETRY_WAIT_MAX,
+                    status_forcelist=[429, 503],
+                    respect_retry_after_header=True,
+                    allowed_methods=["POST"],
+                    raise_on_status=False,  # hand the last response to raise_for_status()
+                )
+                credentials = b64encode(f"{user_email}:{api_token}".encode()).decode()
+                session = requests.Session()
+                session.headers.update({
+                    "Authorization": f"Basic {credentials}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                })
+                session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retry))
+                _SESSION_CACHE[key] = session
+    return session
+
+
+def _json_dumps(obj):
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data):
+    """Parse JSON from bytes or str (raises ValueError on bad input)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=128)
+def _parse_config(raw_config):
+    """Parse a stored service config, memoized on the raw JSON text.
+
+    Keying on the text itself means an edited config is simply a new cache
+    entry. The returned dict is shared and must not be modified.
+    """
+    return _json_loads(raw_config)
+
+
+def _get_service_config_model():
+    """Return the MessagingServiceConfig model, resolved once per process.
+
+    alerts.models imports this module to register the backend, so the model
+    cannot be imported at module level.
+    """
+    global _MessagingServiceConfig
+    if _MessagingServiceConfig is None:
+        _MessagingServiceConfig = apps.get_model("alerts", "MessagingServiceConfig")
+    return _MessagingServiceConfig
+
+
+def _load_config(service_config_id):
+    """Load and parse a service config in the worker; None if it was deleted."""
+    MessagingServiceConfig = _get_service_config_model()
+    try:
+        service_config = MessagingServiceConfig.objects.only("config").get(id=service_config_id)
+    except MessagingServiceConfig.DoesNotExist:
+        return None
+    return _parse_config(service_config.config)
 
 
 def _store_failure_info(service_config_id, exception, response=None):
     """Store failure information in the MessagingServiceConfig."""
-    from alerts.models import MessagingServiceConfig
+    MessagingServiceConfig = _get_service_config_model()
 
     with immediate_atomic(only_if_needed=True):
         try:
-            config = MessagingServiceConfig.objects.get(id=service_config_id)
+            config = MessagingServiceConfig.objects.only(*_FAILURE_FIELDS).get(id=service_config_id)
 
             config.last_failure_timestamp = timezone.now()
             config.last_failure_error_type = type(exception).__name__
@@ -135,7 +291,7 @@ def _store_failure_info(service_config_id, exception, response=None):
                 config.last_failure_response_text = response.text[:2000]
 
                 try:
-                    json.loads(response.text)
+                    _json_loads(response.content)
                     config.last_failure_is_json = True
                 except (json.JSONDecodeError, ValueError):
                     config.last_failure_is_json = False
@@ -144,29 +300,43 @@ def _store_failure_info(service_config_id, exception, response=None):
                 config.last_failure_response_text = None
                 config.last_failure_is_json = None
 
-            config.save()
+            config.save(update_fields=_FAILURE_FIELDS)
         except MessagingServiceConfig.DoesNotExist:
             pass  # Config was deleted, nothing to update
 
 
 def _store_success_info(service_config_id):
-    """Clear failure information on successful operation."""
-    from alerts.models import MessagingServiceConfig
+    """Clear failure information on successful operation.
+
+    The row is only written when a failure is actually recorded, so the
+    common case of consecutive successes costs a single primary-key read.
+    """
+    MessagingServiceConfig = _get_service_config_model()
 
     with immediate_atomic(only_if_needed=True):
         try:
-            config = MessagingServiceConfig.objects.get(id=service_config_id)
-            config.clear_failure_status()
-            config.save()
+            config = MessagingServiceConfig.objects.only(*_FAILURE_FIELDS).get(id=service_config_id)
+            if config.last_failure_timestamp is not None:
+                config.clear_failure_status()
+                config.save(update_fields=_FAILURE_FIELDS)
         except MessagingServiceConfig.DoesNotExist:
             pass  # Config was deleted, nothing to update
 
 
 @shared_task
-def jira_cloud_backend_send_test_message(jira_url, user_email, api_token, project_key,
-                                          issue_type, labels, project_name,
-                                          display_name, service_config_id):
+def jira_cloud_backend_send_test_message(project_name, display_name, service_config_id):
     """Send a test message to verify Jira configuration."""
+    config = _load_config(service_config_id)
+    if config is None:
+        return  # Config was deleted, nothing to send
+
+    jira_url = config["jira_url"]
+    user_email = config["user_email"]
+    api_token = config["api_token"]
+    project_key = config["project_key"]
+    issue_type = config["issue_type"]
+    labels = config.get("labels", [])
+
     url = f"{jira_url}/rest/api/3/issue"
 
     payload = {
@@ -197,14 +367,9 @@ def jira_cloud_backend_send_test_message(jira_url, user_email, api_token, projec
         payload["fields"]["labels"] = labels
 
     try:
-        result = requests.post(
+        result = _get_jira_session(jira_url, user_email, api_token).post(
             url,
-            data=json.dumps(payload),
-            headers={
-                "Authorization": _get_auth_header(user_email, api_token),
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
+            data=_json_dumps(payload),
             timeout=5,
         )
         result.raise_for_status()
@@ -219,33 +384,39 @@ def jira_cloud_backend_send_test_message(jira_url, user_email, api_token, projec
 
 
 @shared_task
-def jira_cloud_backend_send_alert(jira_url, user_email, api_token, project_key,
-                                   issue_type, labels, issue_id, state_description,
-                                   alert_article, alert_reason, service_config_id,
-                                   unmute_reason=None):
+def jira_cloud_backend_send_alert(issue_id, state_description, alert_article, alert_reason,
+                                   service_config_id, unmute_reason=None):
     """Create a Jira issue for a Bugsink alert."""
-    issue = Issue.objects.get(id=issue_id)
+    config = _load_config(service_config_id)
+    if config is None:
+        return  # Config was deleted, nothing to send
+
+    jira_url = config["jira_url"]
+    user_email = config["user_email"]
+    api_token = config["api_token"]
+    project_key = config["project_key"]
+    issue_type = config["issue_type"]
+    labels = config.get("labels", [])
+
+    issue = Issue.objects.select_related("project").get(id=issue_id)
     issue_url = get_settings().BASE_URL + issue.get_absolute_url()
 
     summary = f"[{state_description}] {issue.calculated_type or 'Error'}: {issue.calculated_value or 'Unknown'}"
 
-    description_lines = [
-        f"Error Type: {issue.calculated_type or 'Unknown'}",
-        f"Error Message: {issue.calculated_value or 'No message'}",
-        "",
-        f"View in Bugsink: {issue_url}",
-        "",
-        f"First Seen: {issue.first_seen.isoformat() if issue.first_seen else 'Unknown'}",
-        f"Last Seen: {issue.last_seen.isoformat() if issue.last_seen else 'Unknown'}",
-        f"Event Count: {issue.digested_event_count}",
-        "",
-        f"Project: {issue.project.name}",
-        f"Alert Type: {state_description}",
-        f"Reason: {alert_reason}",
-    ]
+    description = _DESCRIPTION_TEMPLATE.format(
+        error_type=issue.calculated_type or "Unknown",
+        error_message=issue.calculated_value or "No message",
+        issue_url=issue_url,
+        first_seen=issue.first_seen.isoformat() if issue.first_seen else "Unknown",
+        last_seen=issue.last_seen.isoformat() if issue.last_seen else "Unknown",
+        event_count=issue.digested_event_count,
+        project=issue.project.name,
+        state_description=state_description,
+        alert_reason=alert_reason,
+    )
 
     if unmute_reason:
-        description_lines.append(f"Unmute Reason: {unmute_reason}")
+        description += f"\nUnmute Reason: {unmute_reason}"
 
     url = f"{jira_url}/rest/api/3/issue"
 
@@ -259,7 +430,7 @@ def jira_cloud_backend_send_alert(jira_url, user_email, api_token, project_key,
                 "content": [
                     {
                         "type": "paragraph",
-                        "content": [{"type": "text", "text": "\n".join(description_lines)}]
+                        "content": [{"type": "text", "text": description}]
                     }
                 ]
             },
@@ -271,14 +442,9 @@ def jira_cloud_backend_send_alert(jira_url, user_email, api_token, project_key,
         payload["fields"]["labels"] = labels
 
     try:
-        result = requests.post(
+        result = _get_jira_session(jira_url, user_email, api_token).post(
             url,
-            data=json.dumps(payload),
-            headers={
-                "Authorization": _get_auth_header(user_email, api_token),
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
+            data=_json_dumps(payload),
             timeout=5,
         )
         result.raise_for_status()
@@ -303,33 +469,22 @@ class JiraCloudBackend:
         return JiraCloudConfigForm
 
     def send_test_message(self):
-        config = json.loads(self.service_config.config)
+        # Only the config id travels through the task queue; the worker
+        # loads the config (including the API token) itself
         jira_cloud_backend_send_test_message.delay(
-            config["jira_url"],
-            config["user_email"],
-            config["api_token"],
-            config["project_key"],
-            config["issue_type"],
-            config.get("labels", []),
             self.service_config.project.name,
             self.service_config.display_name,
             self.service_config.id,
         )
 
     def send_alert(self, issue_id, state_description, alert_article, alert_reason, **kwargs):
-        config = json.loads(self.service_config.config)
+        config = _parse_config(self.service_config.config)
 
         # Check alert filter
         if config.get("alert_filter", "new_only") == "new_only" and state_description != "NEW":
             return
 
         jira_cloud_backend_send_alert.delay(
-            config["jira_url"],
-            config["user_email"],
-            config["api_token"],
-            config["project_key"],
-            config["issue_type"],
-            config.get("labels", []),
             issue_id,
             state_description,
             alert_article,
@@ -23,6 +23,8 @@ Office 365 Connectors by March 2026 - migrate to Workflows.
 """
 
 import json
+import re
+
 import requests
 
 from django import forms
@@ -35,6 +37,10 @@ from bugsink.transaction import immediate_atomic
 from issues.models import Issue
 
 
+# One item of a comma-separated list, without surrounding whitespace
+_LIST_ITEM_RE = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
+
+
 class MicrosoftTeamsConfigForm(forms.Form):
     """Configuration form for Microsoft Teams integration."""
 
@@ -80,7 +86,7 @@ class MicrosoftTeamsConfigForm(forms.Form):
         return {
             "webhook_url": self.cleaned_data["webhook_url"],
             "channel_name": self.cleaned_data.get("channel_name", ""),
-            "mention_users": [u.strip() for u in self.cleaned_data.get("mention_users", "").split(",") if u.strip()],
+            "mention_users": _LIST_ITEM_RE.findall(self.cleaned_data.get("mention_users", "")),
             "title_color": self.cleaned_data.get("title_color", "attention"),
         }
 
@@ -259,7 +265,7 @@ def microsoft_teams_send_alert(webhook_url, channel_name, mention_users, title_c
                                 issue_id, state_description, alert_article, alert_reason,
                                 service_config_id, unmute_reason=None):
     """Send an alert to Microsoft Teams."""
-    issue = Issue.objects.get(id=issue_id)
+    issue = Issue.objects.select_related("project").get(id=issue_id)
     issue_url = get_settings().BASE_URL + issue.get_absolute_url()
 
     title = f"[{state_description}] {issue.calculated_type or 'Error'}: {issue.calculated_value or 'Unknown'}"
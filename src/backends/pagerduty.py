@@ -177,7 +177,7 @@ def pagerduty_send_alert(routing_key, default_severity, service_name, include_li
                           issue_id, state_description, alert_article, alert_reason,
                           service_config_id, unmute_reason=None):
     """Create a PagerDuty incident for a Bugsink alert."""
-    issue = Issue.objects.get(id=issue_id)
+    issue = Issue.objects.select_related("project").get(id=issue_id)
     issue_url = get_settings().BASE_URL + issue.get_absolute_url()
 
     summary = f"[{state_description}] {issue.calculated_type or 'Error'}: {issue.calculated_value or 'Unknown'}"
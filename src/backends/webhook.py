@@ -208,7 +208,7 @@ def webhook_send_alert(webhook_url, http_method, secret_header, secret_value,
                         issue_id, state_description, alert_article, alert_reason,
                         service_config_id, unmute_reason=None):
     """Send an alert webhook."""
-    issue = Issue.objects.get(id=issue_id)
+    issue = Issue.objects.select_related("project").get(id=issue_id)
     issue_url = get_settings().BASE_URL + issue.get_absolute_url()
 
     payload = {
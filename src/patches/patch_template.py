@@ -41,11 +41,12 @@ def verify_modern_templates():
     print(f"  project_messaging_service_edit.html: {'OK' if edit_exists else 'MISSING'}")
 
     if new_exists:
-        with open(NEW_TEMPLATE, "r", encoding="utf-8") as f:
+        # Only a marker search is needed, so scan the raw bytes
+        with open(NEW_TEMPLATE, "rb") as f:
             content = f.read()
 
         # Check for modern architecture indicators
-        has_config_forms = "config_forms" in content
+        has_config_forms = b"config_forms" in content
         print(f"  config_forms dictionary support: {'OK' if has_config_forms else 'MISSING'}")
 
         if has_config_forms:
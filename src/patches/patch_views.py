@@ -32,16 +32,17 @@ def verify_modern_architecture():
         print(f"  [ERROR] {VIEWS_FILE} does not exist!")
         return False
 
-    with open(VIEWS_FILE, "r", encoding="utf-8") as f:
+    # Only marker searches are needed, so scan the raw bytes without decoding
+    with open(VIEWS_FILE, "rb") as f:
         content = f.read()
 
     print(f"  File size: {len(content)} bytes")
 
     # Check for modern architecture indicators
     checks = [
-        ("get_alert_service_backend_class", "Dynamic backend class loading"),
-        ("get_form_class()", "Dynamic form class loading"),
-        ("get_alert_service_kind_choices", "Dynamic kind choices"),
+        (b"get_alert_service_backend_class", "Dynamic backend class loading"),
+        (b"get_form_class()", "Dynamic form class loading"),
+        (b"get_alert_service_kind_choices", "Dynamic kind choices"),
     ]
 
     all_ok = True
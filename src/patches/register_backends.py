@@ -21,6 +21,7 @@ import os
 import sys
 import re
 import traceback
+from pathlib import Path
 
 # Paths - Bugsink is installed as a Python package in site-packages
 SITE_PACKAGES = "/usr/local/lib/python3.12/site-packages"
@@ -37,15 +38,51 @@ BACKENDS = [
     ("webhook", "WebhookBackend", "webhook", "Webhook (Generic)"),
 ]
 
+# Patterns used to locate the patch points in alerts/models.py
+BACKEND_IMPORT_RE = re.compile(r'from \.service_backends\.\w+ import \w+Backend\n')
+CHOICE_RE = re.compile(r'\("(\w+)", "([^"]+)"\)')
+
+# Line templates for the generated import block and kind -> class table
+IMPORT_TEMPLATE = "from .service_backends.{module} import {cls}\n"
+CLASS_ENTRY_TEMPLATE = '    "{kind}": {cls},\n'
+
+# Code inserted into models.py; BACKENDS is constant, so it is built once at import
+IMPORT_BLOCK = (
+    "".join(IMPORT_TEMPLATE.format(module=m, cls=c) for m, c, _, _ in BACKENDS)
+    + "\nCUSTOM_BACKEND_CLASSES = {\n"
+    + "".join(CLASS_ENTRY_TEMPLATE.format(kind=k, cls=c) for _, c, k, _ in BACKENDS)
+    + "}\n"
+)
+LOOKUP_BLOCK = (
+    "    backend_class = CUSTOM_BACKEND_CLASSES.get(kind)\n"
+    "    if backend_class is not None:\n"
+    "        return backend_class\n"
+)
+
+# Import added for the first backend; its presence means models.py is patched
+PATCHED_MARKER = f"from .service_backends.{BACKENDS[0][0]} import {BACKENDS[0][1]}"
+
+# Literal anchors delimiting the choices list in get_alert_service_kind_choices()
+CHOICES_FUNC_ANCHOR = "def get_alert_service_kind_choices():"
+CHOICES_LIST_ANCHOR = "return ["
+
+# Literal anchor: new backend cases are inserted right before this line
+RAISE_ANCHOR = '    raise ValueError(f"Unknown backend kind:'
+
 
 def verify_backend_files():
     """Verify that our backend files were copied."""
     print("Step 1: Verifying backend files...")
 
+    # List the directory once instead of stat-ing every backend file
+    try:
+        existing = {entry.name for entry in os.scandir(SERVICE_BACKENDS_DIR)}
+    except FileNotFoundError:
+        existing = set()
+
     all_ok = True
     for module_name, class_name, kind, display_name in BACKENDS:
-        file_path = os.path.join(SERVICE_BACKENDS_DIR, f"{module_name}.py")
-        exists = os.path.exists(file_path)
+        exists = f"{module_name}.py" in existing
         print(f"  {module_name}.py: {'OK' if exists else 'MISSING'}")
         if not exists:
             all_ok = False
@@ -53,25 +90,44 @@ def verify_backend_files():
     return all_ok
 
 
+def splice(content, edits):
+    """Apply (start, end, replacement) edits to content in a single pass.
+
+    Offsets refer to the original content and edits must not overlap.
+    """
+    parts = []
+    prev = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: edit[0]):
+        parts.append(content[prev:start])
+        parts.append(replacement)
+        prev = end
+    parts.append(content[prev:])
+    return "".join(parts)
+
+
 def patch_models_file():
-    """Patch alerts/models.py to register our backends."""
+    """Patch alerts/models.py to register our backends.
+
+    Returns (success, content), where content is the models.py source as it
+    is now on disk (None if the file could not be read).
+    """
     print("\nStep 2: Patching alerts/models.py...")
 
     if not os.path.exists(MODELS_FILE):
         print(f"  [ERROR] {MODELS_FILE} does not exist!")
-        return False
+        return False, None
 
-    with open(MODELS_FILE, "r", encoding="utf-8") as f:
-        content = f.read()
+    content = Path(MODELS_FILE).read_text(encoding="utf-8")
 
     print(f"  Original file size: {len(content)} bytes")
 
-    # Check if already patched
-    if "jira_cloud" in content and "JiraCloudBackend" in content:
+    # Check if already patched (our import line is only present after patching)
+    if PATCHED_MARKER in content:
         print("  [OK] Already patched")
-        return True
+        return True, content
 
-    original_content = content
+    # Edits are collected against the original content and applied at the end
+    edits = []
 
     # === STEP A: Add imports ===
     # Find the last existing backend import and add ours after it
@@ -80,85 +136,62 @@ def patch_models_file():
     #   from .service_backends.mattermost import MattermostBackend
     #   from .service_backends.discord import DiscordBackend
 
-    # Find the last backend import line
-    import_pattern = r'(from \.service_backends\.\w+ import \w+Backend\n)(?=\n)'
-
-    if re.search(import_pattern, content):
-        # Build our import lines
-        new_imports = ""
-        for module_name, class_name, kind, display_name in BACKENDS:
-            new_imports += f"from .service_backends.{module_name} import {class_name}\n"
-
-        # Find position after last import
-        matches = list(re.finditer(r'from \.service_backends\.\w+ import \w+Backend\n', content))
-        if matches:
-            last_match = matches[-1]
-            insert_pos = last_match.end()
-            content = content[:insert_pos] + new_imports + content[insert_pos:]
-            print("  [OK] Added import statements")
-        else:
-            print("  [WARN] Could not find position for imports")
-            return False
+    # Collect all backend imports in one scan; the import block must end in a blank line.
+    # Skip the regex entirely when no backend import can be present.
+    matches = []
+    if "from .service_backends." in content:
+        matches = list(BACKEND_IMPORT_RE.finditer(content))
+    if any(content.startswith("\n", m.end()) for m in matches):
+        # Insert our imports and the kind -> class lookup table after the last import
+        insert_pos = matches[-1].end()
+        edits.append((insert_pos, insert_pos, IMPORT_BLOCK))
+        print("  [OK] Added import statements")
     else:
         print("  [WARN] Could not find backend import pattern")
-        return False
+        return False, content
 
     # === STEP B: Update get_alert_service_kind_choices() ===
     # Find the function and add our choices to the list
     # The function returns a list like: [("discord", "Discord"), ("slack", "Slack"), ...]
 
-    choices_func_pattern = r'(def get_alert_service_kind_choices\(\):.*?return \[)(.*?)(\])'
+    # Locate the list with plain finds: the function, its "return [", then the first "]"
+    func_pos = content.find(CHOICES_FUNC_ANCHOR)
+    list_start = close_pos = -1
+    if func_pos != -1:
+        list_start = content.find(CHOICES_LIST_ANCHOR, func_pos)
+    if list_start != -1:
+        list_start += len(CHOICES_LIST_ANCHOR)
+        close_pos = content.find("]", list_start)
+    if close_pos != -1:
+        existing_choices = content[list_start:close_pos]
+
+        # Merge our choices into the existing ones by kind; existing entries win
+        choices = {m[1]: m[2] for m in CHOICE_RE.finditer(existing_choices)}
+        for module_name, class_name, kind, display_name in BACKENDS:
+            choices.setdefault(kind, display_name)
 
-    match = re.search(choices_func_pattern, content, re.DOTALL)
-    if match:
-        prefix = match.group(1)
-        existing_choices = match.group(2)
-        suffix = match.group(3)
+        # Rebuild the choices list, sorted alphabetically by kind
+        rebuilt_choices = "\n" + "".join(
+            f'        ("{kind_val}", "{display}"),\n' for kind_val, display in sorted(choices.items())
+        ) + "    "
 
-        # Add our choices (sorted alphabetically)
-        new_choices = existing_choices.rstrip().rstrip(',')
-        for module_name, class_name, kind, display_name in BACKENDS:
-            # Check if this choice already exists
-            if f'"{kind}"' not in new_choices:
-                new_choices += f',\n        ("{kind}", "{display_name}")'
-
-        # Sort the choices alphabetically by kind
-        # Extract all tuples, sort them, and rebuild
-        choice_pattern = r'\("(\w+)", "([^"]+)"\)'
-        all_choices = re.findall(choice_pattern, new_choices)
-        all_choices = sorted(set(all_choices), key=lambda x: x[0])
-
-        # Rebuild the choices list
-        rebuilt_choices = "\n"
-        for kind_val, display in all_choices:
-            rebuilt_choices += f'        ("{kind_val}", "{display}"),\n'
-        rebuilt_choices += "    "
-
-        content = content[:match.start()] + prefix + rebuilt_choices + suffix + content[match.end():]
+        edits.append((list_start, close_pos, rebuilt_choices))
         print("  [OK] Updated get_alert_service_kind_choices()")
     else:
         print("  [WARN] Could not find get_alert_service_kind_choices() function")
 
     # === STEP C: Update get_alert_service_backend_class() ===
-    # Find the function and add our backend mappings before the raise ValueError line
+    # Find the function and add one lookup in CUSTOM_BACKEND_CLASSES before the
+    # raise ValueError line, instead of an if-branch per backend
     # The function has: if kind == "slack": return SlackBackend
 
     # Find the raise ValueError line in get_alert_service_backend_class and insert before it
-    # Pattern matches the indented raise ValueError line
-    raise_pattern = r'(    raise ValueError\(f"Unknown backend kind:)'
-
-    match = re.search(raise_pattern, content)
-    if match:
-        # Check which backends need to be added
-        new_cases = ""
-        for module_name, class_name, kind, display_name in BACKENDS:
-            if f'if kind == "{kind}"' not in content:
-                new_cases += f'    if kind == "{kind}":\n        return {class_name}\n'
-
-        if new_cases:
-            # Insert new cases before the raise statement
-            insert_pos = match.start(1)
-            content = content[:insert_pos] + new_cases + content[insert_pos:]
+    # The anchor is the indented raise ValueError line
+    insert_pos = content.find(RAISE_ANCHOR)
+    if insert_pos != -1:
+        if LOOKUP_BLOCK not in content:
+            # Insert the lookup before the raise statement
+            edits.append((insert_pos, insert_pos, LOOKUP_BLOCK))
             print("  [OK] Updated get_alert_service_backend_class()")
         else:
             print("  [OK] get_alert_service_backend_class() already has all backends")
@@ -166,25 +199,22 @@ def patch_models_file():
         print("  [WARN] Could not find raise ValueError in get_alert_service_backend_class()")
 
     # Write the patched content
-    if content != original_content:
-        with open(MODELS_FILE, "w", encoding="utf-8") as f:
-            f.write(content)
-        print(f"  Patched file size: {len(content)} bytes")
+    patched = splice(content, edits)
+    if patched != content:
+        Path(MODELS_FILE).write_text(patched, encoding="utf-8")
+        print(f"  Patched file size: {len(patched)} bytes")
         print("  [OK] models.py patched successfully")
-        return True
+        return True, patched
     else:
         print("  [WARN] No changes made to models.py")
-        return False
+        return False, content
 
 
-def verify_syntax():
-    """Verify the patched file has valid Python syntax."""
+def verify_syntax(content):
+    """Verify the patched source (as written to MODELS_FILE) has valid Python syntax."""
     print("\nStep 3: Verifying Python syntax...")
 
     try:
-        with open(MODELS_FILE, "r", encoding="utf-8") as f:
-            content = f.read()
-
         compile(content, MODELS_FILE, "exec")
         print("  [OK] Syntax is valid")
         return True
@@ -195,13 +225,11 @@ def verify_syntax():
         return False
 
 
-def show_patched_content():
+def show_patched_content(content):
     """Show the patched models.py content for verification."""
     print("\n--- Patched models.py (first 100 lines) ---")
-    with open(MODELS_FILE, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-        for i, line in enumerate(lines[:100], 1):
-            print(f"  {i:3}: {line.rstrip()}")
+    lines = content.splitlines()
+    sys.stdout.write("".join(f"  {i:3}: {line.rstrip()}\n" for i, line in enumerate(lines[:100], 1)))
     if len(lines) > 100:
         print(f"  ... ({len(lines) - 100} more lines)")
     print("--- End ---")
@@ -219,17 +247,18 @@ def main():
             sys.exit(1)
 
         # Step 2: Patch models.py
-        if not patch_models_file():
+        patched, content = patch_models_file()
+        if not patched:
             print("\n[ERROR] Failed to patch models.py")
             sys.exit(1)
 
         # Step 3: Verify syntax
-        if not verify_syntax():
+        if not verify_syntax(content):
             print("\n[ERROR] Patched file has syntax errors")
             sys.exit(1)
 
         # Show patched content for verification
-        show_patched_content()
+        show_patched_content(content)
 
         print("\n" + "=" * 60)
         print("[SUCCESS] Backend registration complete!")